@@ -1,10 +1,86 @@
+import copy
 from enum import Enum
-import json,yaml
+import errno
 import logging
-from typing import List, Optional, Tuple, Annotated
-from pydantic import BaseModel, Field, field_validator, ValidationError, ConfigDict
+import mmap
+import os
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple, Annotated
+from pydantic import BaseModel, Field, field_validator, field_serializer, ValidationError, ConfigDict, TypeAdapter, PrivateAttr, StringConstraints, FieldSerializationInfo
 
 
+_DIRECT_IO_ALIGN = 4096  # O_DIRECT needs block-aligned buffers and lengths
+
+def _write_direct(file_path: str, payload: bytes) -> bool:
+    """Atomically replace file_path with payload, written with O_DIRECT.
+    
+    The payload goes to a temp file in the same directory, which is trimmed to
+    length and fsynced before os.replace swaps it in, so readers never see a
+    truncated or padded config. Returns False when the platform or filesystem
+    does not support O_DIRECT, so the caller can fall back to a buffered write.
+    """
+    if not hasattr(os, 'O_DIRECT'):
+        return False
+    size = max(-(-len(payload) // _DIRECT_IO_ALIGN) * _DIRECT_IO_ALIGN, _DIRECT_IO_ALIGN)
+    file_path = os.path.realpath(file_path)  # replace a symlink's target, not the link itself
+    directory = os.path.dirname(file_path)
+    tmp_path = f"{file_path}.{os.getpid()}.{os.urandom(4).hex()}.tmp"
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = None  # new file: let umask apply, as open() does
+    buf = mmap.mmap(-1, size)  # anonymous mappings are page-aligned
+    replaced = False
+    try:
+        buf[:len(payload)] = payload
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_DIRECT, 0o666)
+        except OSError as e:
+            if e.errno == errno.EINVAL:  # e.g. tmpfs
+                return False
+            raise
+        try:
+            if mode is not None:
+                os.fchmod(fd, mode)  # keep the existing file's permissions regardless of umask
+            try:
+                written = os.write(fd, buf)
+            except OSError as e:
+                if e.errno == errno.EINVAL:  # some filesystems only reject O_DIRECT at write time
+                    return False
+                raise
+            if written != size:
+                raise OSError(errno.EIO, f"Short O_DIRECT write to {tmp_path}")
+            os.ftruncate(fd, len(payload))  # drop the alignment padding
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, file_path)
+        replaced = True
+        # Persist the rename itself
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    finally:
+        buf.close()
+        if not replaced:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+    return True
+
+@lru_cache(maxsize=None)
+def _yaml_codec():
+    """Import PyYAML on first use, so JSON-only callers never load it"""
+    import yaml
+    try:
+        from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    except ImportError:  # PyYAML built without libyaml
+        from yaml import SafeLoader, SafeDumper
+    return yaml, SafeLoader, SafeDumper
+
 #str is used so that when you use this enum to string , it will convert data to string and give back.
 class Environment(str, Enum):
     DEV = "dev"
@@ -18,29 +94,28 @@ class LogLevel(str, Enum):
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
-class Target(BaseModel):
-    model_config = ConfigDict(frozen=True)  # Make targets immutable
-    
-    host: str = Field(..., description="Target hostname or IP address")
-    port: Annotated[int, Field(ge=1, le=65535)] = Field(..., description="Target port number")
-    
-    @field_validator('host')
-    @classmethod
-    def validate_host(cls, v: str) -> str:
-        if not v.strip():
-            raise ValueError('Host cannot be empty')
-        return v.strip()
+# Value -> member lookup tables, so validation skips EnumMeta.__call__
+_ENV_MAP = {e.value: e for e in Environment}
+_LOG_MAP = {level.value: level for level in LogLevel}
+
+class Target(NamedTuple):
+    """Target host and port; a plain tuple (no per-instance __dict__), so it stays immutable and cheap to hold"""
+    host: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1),
+                    Field(description="Target hostname or IP address")]
+    port: Annotated[int, Field(ge=1, le=65535, description="Target port number")]
     
     def to_tuple(self) -> Tuple[str, int]:
-        return (self.host, self.port)
+        return self
     
     @classmethod
     def from_tuple(cls, target_tuple: Tuple[str, int]) -> 'Target':
-        return cls(host=target_tuple[0], port=target_tuple[1])
+        return _TARGET_ADAPTER.validate_python(target_tuple)
+
+# Validates a single (host, port) outside of AgentConfig, e.g. for add_target
+_TARGET_ADAPTER = TypeAdapter(Target)
 
 class AgentConfig(BaseModel):
     model_config = ConfigDict(
-        validate_assignment=True,  # Validate when attributes are set
         extra='forbid',  # Reject extra fields
         str_strip_whitespace=True,  # Strip whitespace from strings
         use_enum_values=True  # Use enum values in serialization
@@ -51,19 +126,35 @@ class AgentConfig(BaseModel):
         default=60, 
         description="Scan interval in seconds (1-86400)"
     )
-    modules: List[str] = Field(
-        default_factory=list, 
+    modules: Tuple[str, ...] = Field(
+        default_factory=tuple, 
         description="List of enabled modules"
     )
     log_level: LogLevel = Field(
         default=LogLevel.INFO, 
         description="Logging level"
     )
-    targets: List[Target] = Field(
-        default_factory=list, 
+    targets: Tuple[Target, ...] = Field(
+        default_factory=tuple, 
         description="List of target hosts and ports"
     )
     
+    # Serialized forms keyed by a snapshot of the values they were built from, so any write
+    # path (assignment, in-place list mutation, model_copy(update=...)) causes a miss
+    _json_cache: Optional[Tuple[tuple, str]] = PrivateAttr(default=None)
+    _yaml_cache: Optional[Tuple[tuple, str]] = PrivateAttr(default=None)
+    
+    @field_validator('environment', mode='before')
+    @classmethod
+    def lookup_environment(cls, v):
+        # Unknown values fall through to the enum validator for the error message
+        return _ENV_MAP.get(v, v) if isinstance(v, str) else v
+    
+    @field_validator('log_level', mode='before')
+    @classmethod
+    def lookup_log_level(cls, v):
+        return _LOG_MAP.get(v, v) if isinstance(v, str) else v
+    
     @field_validator('scan_interval')
     @classmethod
     def validate_scan_interval(cls, v: int) -> int:
@@ -75,54 +166,93 @@ class AgentConfig(BaseModel):
     
     @field_validator('modules')
     @classmethod
-    def validate_modules(cls, v: List[str]) -> List[str]:
-        if not all(isinstance(module, str) and module.strip() for module in v):
+    def validate_modules(cls, v: Tuple[str, ...]) -> Tuple[str, ...]:
+        # Items are already stripped by str_strip_whitespace, so only emptiness is checked
+        if not all(v):
             raise ValueError('All modules must be non-empty strings')
-        return [module.strip() for module in v]
-    
-    @field_validator('targets')
-    @classmethod
-    def validate_targets(cls, v: List[Target]) -> List[Target]:
-        if not all(isinstance(target, Target) for target in v):
-            raise ValueError('All targets must be valid Target objects')
         return v
     
+    @field_serializer('targets')
+    def serialize_targets(self, v: Tuple[Target, ...], info: FieldSerializationInfo) -> list:
+        # JSON keeps the {host, port} object shape of config files; Python dumps use
+        # compact [host, port] pairs, as model_dump always has
+        if info.mode_is_json():
+            return [target._asdict() for target in v]
+        return [list(target) for target in v]
+    
     def to_json(self) -> str:
-        return self.model_dump_json(indent=4)
+        # Read private attrs from the dict; attribute access goes through BaseModel.__getattr__
+        private = self.__pydantic_private__
+        key = self._fields_key()
+        cached = private['_json_cache']
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        # Serialized natively by pydantic-core; no stdlib json encode on this path
+        out = self.model_dump_json(indent=4)
+        private['_json_cache'] = (key, out)
+        return out
     
     def to_yaml(self) -> str:
-        # Convert to dict and handle targets specially
-        config_dict = self.model_dump()
-        config_dict['targets'] = [[target.host, target.port] for target in self.targets]
-        return yaml.dump(config_dict, default_flow_style=False)
+        private = self.__pydantic_private__
+        key = self._fields_key()
+        cached = private['_yaml_cache']
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        yaml, _, SafeDumper = _yaml_codec()
+        # Build the YAML-ready dict directly instead of going through model_dump
+        config_dict = {
+            'environment': self.environment.value if isinstance(self.environment, Environment) else self.environment,
+            'scan_interval': self.scan_interval,
+            'modules': list(self.modules),
+            'log_level': self.log_level.value if isinstance(self.log_level, LogLevel) else self.log_level,
+            'targets': [list(target) for target in self.targets],
+        }
+        out = yaml.dump(config_dict, Dumper=SafeDumper, default_flow_style=False)
+        private['_yaml_cache'] = (key, out)
+        return out
+    
+    @classmethod
+    def cached_json_schema(cls) -> dict:
+        """JSON schema for this model; built once, callers get their own copy to modify"""
+        schema = _SCHEMA_CACHE.get(cls)
+        if schema is None:
+            schema = _SCHEMA_CACHE[cls] = cls.model_json_schema()
+        return copy.deepcopy(schema)
     
     @classmethod
-    def from_dict(cls, config_dict: dict) -> 'AgentConfig':
-        # Convert targets from tuples/lists to Target objects
-        if 'targets' in config_dict:
-            targets = []
-            for target in config_dict['targets']:
-                if isinstance(target, (tuple, list)) and len(target) == 2:
-                    targets.append(Target(host=target[0], port=target[1]))
-                elif isinstance(target, dict) and 'host' in target and 'port' in target:
-                    targets.append(Target(**target))
-                else:
-                    raise ValueError(f"Invalid target format: {target}")
-            config_dict['targets'] = targets
+    def from_dict(cls, config_dict: dict, _trusted: bool = False) -> 'AgentConfig':
+        """Build a config from a dict.
         
-        return cls(**config_dict)
+        _trusted=True skips validation entirely and is only for first-party blobs
+        this process serialized itself (e.g. a previous save/model_dump).
+        """
+        if _trusted:
+            data = dict(config_dict)
+            if 'targets' in data:
+                data['targets'] = tuple(
+                    Target(**target) if isinstance(target, dict) else Target(*target)
+                    for target in data['targets']
+                )
+            if 'modules' in data:
+                data['modules'] = tuple(data['modules'])
+            return cls.model_construct(**data)
+        # Enum strings and raw targets go straight to the field validators, which convert them once
+        return cls.model_validate(config_dict)
     
-    def save(self, file_path: str) -> None:
-        """Save configuration to file"""
+    def save(self, file_path: str, direct: bool = False) -> None:
+        """Save configuration to file; direct=True atomically replaces it via O_DIRECT where supported"""
         try:
+            # Serialize first so a failure never leaves a truncated file, then write once
             if file_path.endswith('.json'):
-                with open(file_path, 'w') as f:
-                    f.write(self.to_json())
+                payload = self.to_json().encode('utf-8')
             elif file_path.endswith('.yaml'):
-                with open(file_path, 'w') as f:
-                    f.write(self.to_yaml())
+                payload = self.to_yaml().encode('utf-8')
             else:
                 raise ValueError("Unsupported file extension - must be .json or .yaml")
+            if direct and _write_direct(file_path, payload):
+                return
+            with open(file_path, 'wb') as f:
+                f.write(payload)
         except Exception as e:
             logging.error(f"Error saving config to {file_path}: {e}")
             raise
@@ -131,37 +261,48 @@ class AgentConfig(BaseModel):
     def load(cls, file_path: str) -> 'AgentConfig':
         """Load configuration from file"""
         try:
-            if file_path.endswith('.json'):
-                with open(file_path, 'r') as f:
-                    config_dict = json.load(f)
-                    return cls.from_dict(config_dict)
-            elif file_path.endswith('.yaml'):
-                with open(file_path, 'r') as f:
-                    config_dict = yaml.safe_load(f)
-                    return cls.from_dict(config_dict)
-            else:
+            if not file_path.endswith(('.json', '.yaml')):
                 raise ValueError("Unsupported file extension - must be .json or .yaml")
+            # Read the whole file in one call and hand the bytes to the parser
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            if file_path.endswith('.json'):
+                return cls.model_validate_json(data)
+            yaml, SafeLoader, _ = _yaml_codec()
+            config_dict = yaml.load(data, Loader=SafeLoader)
+            return cls.from_dict(config_dict)
         except Exception as e:
             logging.error(f"Error loading config from {file_path}: {e}")
             raise
     
-    def get_targets_as_tuples(self) -> List[Tuple[str, int]]:
-        """Get targets as list of tuples for backward compatibility"""
-        return [target.to_tuple() for target in self.targets]
+    def __eq__(self, other: object) -> bool:
+        # Compare fields only, so populated caches in private attributes don't affect equality
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+    
+    def _fields_key(self) -> tuple:
+        """Snapshot of the field values; lists (e.g. assigned unvalidated) are copied to tuples"""
+        return tuple([tuple(v) if isinstance(v, list) else v for v in self.__dict__.values()])
+    
+    def get_targets_as_tuples(self) -> Tuple[Target, ...]:
+        """Get targets as tuples for backward compatibility (Target is already a tuple)"""
+        return self.targets
+    
+    def revalidate(self) -> 'AgentConfig':
+        """Return a fully re-validated copy (attribute assignment is not validated)"""
+        return type(self).model_validate(self.model_dump())
     
     def add_target(self, host: str, port: int) -> None:
         """Add a new target"""
-        self.targets.append(Target(host=host, port=port))
+        self.targets = (*self.targets, _TARGET_ADAPTER.validate_python((host, port)))
     
     def remove_target(self, host: str, port: int) -> None:
         """Remove a target by host and port"""
-        self.targets = [t for t in self.targets if not (t.host == host and t.port == port)]
-    
-    def model_dump(self, **kwargs):
-        """Override model_dump to handle targets properly"""
-        data = super().model_dump(**kwargs)
-        data['targets'] = [[target.host, target.port] for target in self.targets]
-        return data
+        self.targets = tuple(t for t in self.targets if t != (host, port))
+
+# model_json_schema() walks the whole type graph, so keep one schema per model class
+_SCHEMA_CACHE: dict = {}
 
 def main():
     print("DevNet Inspector Starting...")
@@ -222,7 +363,7 @@ def main():
         
         # Test model methods
         print("\nTesting Pydantic v2 features:")
-        print(f"Model schema: {AgentConfig.model_json_schema()}")
+        print(f"Model schema: {AgentConfig.cached_json_schema()}")
         print(f"Config fields: {list(AgentConfig.model_fields.keys())}")
         
     except ValidationError as e: